@@ -4,6 +4,10 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
+import openpyxl
+import os
+import pyarrow as pa
+from pyarrow import feather
 
 # Page config
 st.set_page_config(
@@ -42,69 +46,191 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+DAY_ORDER = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday")
+KEEP_COLUMNS = ('Personnel Name', 'Login Time', 'Visit #', 'Location',
+                'Check-In Time', 'Check-Out Time', 'Logout Time', 'Day')
+
+def _read_all_sheets(file_path):
+    """Parse every sheet of the workbook in a single pass"""
+    try:
+        # Fast path: calamine parses the whole workbook once
+        return pd.read_excel(file_path, sheet_name=None, engine="calamine")
+    except ImportError:
+        pass
+    # Fallback: one openpyxl read_only pass; streams rows and shares the
+    # shared-string table instead of re-unzipping the XLSX per sheet
+    wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = {}
+        for name in wb.sheetnames:
+            rows = wb[name].iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is not None:
+                sheets[name] = pd.DataFrame(rows, columns=header)
+        return sheets
+    finally:
+        wb.close()
+
+@st.cache_resource
 def load_data(file_path):
-    """Load data from Excel file"""
-    all_data = []
-    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-    
-    for day in days:
-        try:
-            df = pd.read_excel(file_path, sheet_name=day)
+    """Load data from Excel file
+
+    Cached as a shared resource: every rerun gets the same object back
+    instead of the deep copy st.cache_data makes per hit, so treat the
+    returned frame as read-only and never mutate it in place.
+    """
+    tables = []
+
+    # Warm start: mmap the Feather cache instead of re-parsing the XLSX
+    cache_path = file_path + '.feather'
+    try:
+        if os.path.getmtime(cache_path) >= os.path.getmtime(file_path):
+            cached = feather.read_table(cache_path, memory_map=True).to_pandas()
+            cached = _use_arrow_strings(cached)
+            return cached, _build_meta(cached)
+    except OSError:
+        pass
+
+    try:
+        sheets = _read_all_sheets(file_path)
+    except FileNotFoundError:
+        return pd.DataFrame(), _build_meta(pd.DataFrame())
+
+    for day in DAY_ORDER:
+        if day in sheets:
+            df = sheets[day]
             df['Day'] = day
-            all_data.append(df)
-        except:
+            tables.append(pa.Table.from_pandas(df, preserve_index=False))
+
+    if tables:
+        # Arrow concat chains the per-sheet chunks without copying;
+        # combine_chunks gives contiguous columns for the one to_pandas
+        full = pa.concat_tables(tables, promote_options='permissive')
+        combined_df = full.combine_chunks().to_pandas()
+        # Keep only columns the views read; Selfie and Maps Link are
+        # dead weight in every copy, groupby and cache pickle
+        combined_df = combined_df[[c for c in KEEP_COLUMNS if c in combined_df.columns]]
+        # Low-cardinality text columns: dictionary-encode so groupby/isin
+        # work on integer codes instead of hashing full strings
+        for col in ['Day', 'Personnel Name', 'Location']:
+            combined_df[col] = combined_df[col].astype('category')
+        combined_df = _use_arrow_strings(combined_df)
+        # Integer minutes-since-midnight computed once here; the HH:MM
+        # strings are kept only for display
+        combined_df['CheckInMin'] = _to_minutes(combined_df['Check-In Time'])
+        combined_df['CheckOutMin'] = _to_minutes(combined_df['Check-Out Time'])
+        combined_df['Duration'] = (
+            (combined_df['CheckOutMin'] - combined_df['CheckInMin'])
+            .fillna(0).astype('int32')
+        )
+        try:
+            feather.write_feather(
+                pa.Table.from_pandas(combined_df, preserve_index=False),
+                cache_path,
+                compression='zstd'
+            )
+        except OSError:
             pass
-    
-    if all_data:
-        combined_df = pd.concat(all_data, ignore_index=True)
-        return combined_df
-    return pd.DataFrame()
+        return combined_df, _build_meta(combined_df)
+    return pd.DataFrame(), _build_meta(pd.DataFrame())
 
-def parse_time(time_str):
-    """Convert time string to minutes from midnight"""
-    if pd.isna(time_str):
-        return None
-    try:
-        h, m = map(int, str(time_str).split(':'))
-        return h * 60 + m
-    except:
-        return None
-
-def calculate_duration(check_in, check_out):
-    """Calculate duration in minutes"""
-    ci = parse_time(check_in)
-    co = parse_time(check_out)
-    if ci is not None and co is not None:
-        return co - ci
-    return 0
-
-def get_location_coordinates(location_name):
-    """Get approximate coordinates for Bengaluru locations"""
-    coordinates = {
-        "MG Road": (12.9716, 77.5946),
-        "Koramangala": (12.9352, 77.6245),
-        "Indiranagar": (12.9784, 77.6408),
-        "Whitefield": (12.9698, 77.7499),
-        "Electronic City": (12.8456, 77.6603),
-        "Jayanagar": (12.9250, 77.5838),
-        "Malleswaram": (13.0033, 77.5667),
-        "BTM Layout": (12.9165, 77.6101),
-        "HSR Layout": (12.9082, 77.6476),
-        "Marathahalli": (12.9591, 77.6974),
-        "Banashankari": (12.9250, 77.5483),
-        "Rajajinagar": (12.9916, 77.5544),
-        "JP Nagar": (12.9079, 77.5857),
-        "Yelahanka": (13.1007, 77.5963),
-        "Hebbal": (13.0358, 77.5970)
+def _build_meta(df):
+    """Unique filter options computed once per load, not per rerun"""
+    if df.empty:
+        return {'days': (), 'personnel': ()}
+    return {
+        'days': tuple(d for d in DAY_ORDER if d in df['Day'].cat.categories),
+        'personnel': tuple(df['Personnel Name'].cat.categories)
     }
-    return coordinates.get(location_name, (12.9716, 77.5946))
+
+def _use_arrow_strings(df):
+    """Back the free-text time columns with Arrow strings
+
+    Arrow stores offsets plus contiguous UTF-8 bytes instead of one
+    Python str object per cell, and string kernels run in Arrow C++.
+    The categorical columns keep their dictionary encoding.
+    """
+    arrow_str = pd.ArrowDtype(pa.string())
+    for col in ['Login Time', 'Check-In Time', 'Check-Out Time', 'Logout Time']:
+        if col in df.columns:
+            df[col] = df[col].astype(arrow_str)
+    return df
+
+def _to_minutes(series):
+    """Vectorized HH:MM strings to nullable Int16 minutes since midnight"""
+    td = pd.to_timedelta(series.astype(str) + ':00', errors='coerce')
+    return (td.dt.total_seconds() // 60).astype('Int16')
+
+# Approximate coordinates for Bengaluru locations
+COORDINATES = {
+    "MG Road": (12.9716, 77.5946),
+    "Koramangala": (12.9352, 77.6245),
+    "Indiranagar": (12.9784, 77.6408),
+    "Whitefield": (12.9698, 77.7499),
+    "Electronic City": (12.8456, 77.6603),
+    "Jayanagar": (12.9250, 77.5838),
+    "Malleswaram": (13.0033, 77.5667),
+    "BTM Layout": (12.9165, 77.6101),
+    "HSR Layout": (12.9082, 77.6476),
+    "Marathahalli": (12.9591, 77.6974),
+    "Banashankari": (12.9250, 77.5483),
+    "Rajajinagar": (12.9916, 77.5544),
+    "JP Nagar": (12.9079, 77.5857),
+    "Yelahanka": (13.1007, 77.5963),
+    "Hebbal": (13.0358, 77.5970)
+}
+_LAT = {name: coords[0] for name, coords in COORDINATES.items()}
+_LON = {name: coords[1] for name, coords in COORDINATES.items()}
+# MG Road fallback for unknown locations
+DEFAULT_LAT, DEFAULT_LON = 12.9716, 77.5946
+
+def add_coordinates(location_df):
+    """Attach lat/lon columns via a single C-level map per column"""
+    location_df['lat'] = location_df['Location'].map(_LAT).fillna(DEFAULT_LAT)
+    location_df['lon'] = location_df['Location'].map(_LON).fillna(DEFAULT_LON)
+    return location_df
+
+# Cached view aggregations. Streamlit hashes the (small) filtered frame,
+# so toggling the view mode with unchanged filters reuses these results
+# instead of re-running the groupbys.
+@st.cache_data
+def agg_visits_by_person(df, name='Total Visits'):
+    """Visit counts per person, busiest first"""
+    counts = df['Personnel Name'].value_counts()
+    counts = counts[counts > 0]
+    return counts.rename_axis('Personnel Name').reset_index(name=name)
+
+@st.cache_data
+def agg_visits_by_day(df, name='Total Visits'):
+    """Visit counts per day in weekday order"""
+    counts = df['Day'].value_counts()
+    counts = counts[counts > 0].reindex([d for d in DAY_ORDER if d in df['Day'].unique()])
+    return counts.rename_axis('Day').reset_index(name=name)
+
+@st.cache_data
+def agg_location_counts(df, name='Visits'):
+    """Visit counts per location with map coordinates attached"""
+    counts = df['Location'].value_counts()
+    counts = counts[counts > 0].rename_axis('Location').reset_index(name=name)
+    return add_coordinates(counts)
+
+@st.cache_data
+def agg_person_day_pivot(df):
+    """Person x day visit matrix for the heatmap"""
+    pivot_table = pd.crosstab(df['Personnel Name'], df['Day'])
+    return pivot_table.reindex(columns=[d for d in DAY_ORDER if d in pivot_table.columns], fill_value=0)
+
+@st.cache_data
+def agg_time_by_location(df, n=10):
+    """Top-n locations by total visit duration"""
+    location_time = df.groupby('Location', observed=True, sort=False)['Duration'].sum().reset_index()
+    return location_time.sort_values('Duration', ascending=False).head(n)
 
 def main():
     st.markdown('<div class="main-header">📊 Sales Team Performance Dashboard</div>', unsafe_allow_html=True)
     
     # Load data
-    df = load_data('/home/claude/sales_personnel_tracking.xlsx')
+    df, meta = load_data('/home/claude/sales_personnel_tracking.xlsx')
     
     if df.empty:
         st.error("No data found. Please check the Excel file.")
@@ -113,8 +239,8 @@ def main():
     # Sidebar filters
     st.sidebar.header("🔍 Filters")
     
-    # Day filter
-    days_available = df['Day'].unique().tolist()
+    # Day filter (options precomputed in load_data)
+    days_available = list(meta['days'])
     selected_days = st.sidebar.multiselect(
         "Select Days",
         options=days_available,
@@ -122,18 +248,24 @@ def main():
     )
     
     # Personnel filter
-    personnel_list = df['Personnel Name'].dropna().unique().tolist()
+    personnel_list = list(meta['personnel'])
     selected_personnel = st.sidebar.multiselect(
         "Select Personnel",
         options=personnel_list,
         default=personnel_list
     )
     
-    # Filter data
-    filtered_df = df[
-        (df['Day'].isin(selected_days)) & 
-        (df['Personnel Name'].isin(selected_personnel))
-    ]
+    # Filter on integer category codes instead of hashing strings
+    day_codes = {c: i for i, c in enumerate(df['Day'].cat.categories)}
+    person_codes = {c: i for i, c in enumerate(df['Personnel Name'].cat.categories)}
+    mask = np.isin(
+        df['Day'].cat.codes.to_numpy(),
+        np.array([day_codes[d] for d in selected_days], dtype=np.int8)
+    ) & np.isin(
+        df['Personnel Name'].cat.codes.to_numpy(),
+        np.array([person_codes[p] for p in selected_personnel], dtype=np.int8)
+    )
+    filtered_df = df[mask]
     
     # View selector
     view_mode = st.sidebar.radio(
@@ -148,7 +280,7 @@ def main():
     elif view_mode == "Location Analysis":
         show_location_analysis(filtered_df)
     else:
-        show_daily_timeline(filtered_df)
+        show_daily_timeline(filtered_df, selected_days)
 
 def show_team_overview(df):
     """Display team-wide metrics and charts"""
@@ -159,8 +291,7 @@ def show_team_overview(df):
     total_visits = len(df)
     total_days = df['Day'].nunique()
     
-    # Calculate work hours
-    df['Duration'] = df.apply(lambda x: calculate_duration(x['Check-In Time'], x['Check-Out Time']), axis=1)
+    # Work hours (Duration is precomputed in load_data)
     avg_visit_duration = df['Duration'].mean()
     
     # Top row KPIs
@@ -182,9 +313,8 @@ def show_team_overview(df):
     
     with col1:
         # Visits by personnel
-        visits_by_person = df.groupby('Personnel Name').size().reset_index(name='Total Visits')
-        visits_by_person = visits_by_person.sort_values('Total Visits', ascending=False)
-        
+        visits_by_person = agg_visits_by_person(df)
+
         fig1 = px.bar(
             visits_by_person,
             x='Personnel Name',
@@ -198,11 +328,8 @@ def show_team_overview(df):
     
     with col2:
         # Visits by day
-        visits_by_day = df.groupby('Day').size().reset_index(name='Total Visits')
-        day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-        visits_by_day['Day'] = pd.Categorical(visits_by_day['Day'], categories=day_order, ordered=True)
-        visits_by_day = visits_by_day.sort_values('Day')
-        
+        visits_by_day = agg_visits_by_day(df)
+
         fig2 = px.line(
             visits_by_day,
             x='Day',
@@ -219,9 +346,8 @@ def show_team_overview(df):
     
     with col1:
         # Top locations
-        top_locations = df.groupby('Location').size().reset_index(name='Visits')
-        top_locations = top_locations.sort_values('Visits', ascending=False).head(10)
-        
+        top_locations = agg_location_counts(df).sort_values('Visits', ascending=False).head(10)
+
         fig3 = px.bar(
             top_locations,
             x='Visits',
@@ -236,12 +362,8 @@ def show_team_overview(df):
     
     with col2:
         # Heatmap of visits by person and day
-        pivot_data = df.groupby(['Personnel Name', 'Day']).size().reset_index(name='Visits')
-        pivot_table = pivot_data.pivot(index='Personnel Name', columns='Day', values='Visits').fillna(0)
-        
-        day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-        pivot_table = pivot_table.reindex(columns=[d for d in day_order if d in pivot_table.columns])
-        
+        pivot_table = agg_person_day_pivot(df)
+
         fig4 = px.imshow(
             pivot_table,
             labels=dict(x="Day", y="Personnel", color="Visits"),
@@ -254,9 +376,7 @@ def show_team_overview(df):
     
     # Location map
     st.subheader("🗺️ All Visit Locations")
-    location_counts = df.groupby('Location').size().reset_index(name='Visit Count')
-    location_counts['lat'] = location_counts['Location'].apply(lambda x: get_location_coordinates(x)[0])
-    location_counts['lon'] = location_counts['Location'].apply(lambda x: get_location_coordinates(x)[1])
+    location_counts = agg_location_counts(df, name='Visit Count')
     
     fig_map = px.scatter_mapbox(
         location_counts,
@@ -294,7 +414,6 @@ def show_individual_performance(df, personnel_list):
     days_worked = person_df['Day'].nunique()
     unique_locations = person_df['Location'].nunique()
     
-    person_df['Duration'] = person_df.apply(lambda x: calculate_duration(x['Check-In Time'], x['Check-Out Time']), axis=1)
     avg_duration = person_df['Duration'].mean()
     total_field_time = person_df['Duration'].sum()
     
@@ -318,10 +437,7 @@ def show_individual_performance(df, personnel_list):
     
     with col1:
         # Daily visits
-        daily_visits = person_df.groupby('Day').size().reset_index(name='Visits')
-        day_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-        daily_visits['Day'] = pd.Categorical(daily_visits['Day'], categories=day_order, ordered=True)
-        daily_visits = daily_visits.sort_values('Day')
+        daily_visits = agg_visits_by_day(person_df, name='Visits')
         
         fig1 = px.bar(
             daily_visits,
@@ -336,8 +452,7 @@ def show_individual_performance(df, personnel_list):
     
     with col2:
         # Time spent by location
-        location_time = person_df.groupby('Location')['Duration'].sum().reset_index()
-        location_time = location_time.sort_values('Duration', ascending=False).head(10)
+        location_time = agg_time_by_location(person_df)
         location_time['Duration (hrs)'] = location_time['Duration'] / 60
         
         fig2 = px.pie(
@@ -365,9 +480,7 @@ def show_individual_performance(df, personnel_list):
     # Individual location map
     st.subheader(f"🗺️ {selected_person}'s Visit Locations")
     
-    person_locations = person_df.groupby('Location').size().reset_index(name='Visits')
-    person_locations['lat'] = person_locations['Location'].apply(lambda x: get_location_coordinates(x)[0])
-    person_locations['lon'] = person_locations['Location'].apply(lambda x: get_location_coordinates(x)[1])
+    person_locations = agg_location_counts(person_df)
     
     fig_map = px.scatter_mapbox(
         person_locations,
@@ -391,14 +504,11 @@ def show_location_analysis(df):
     """Display location-based analytics"""
     st.header("📍 Location Analysis")
     
-    # Location metrics
-    location_stats = df.groupby('Location').agg({
-        'Personnel Name': 'count',
-        'Check-In Time': 'count'
-    }).rename(columns={'Personnel Name': 'Total Visits', 'Check-In Time': 'Visit Count'})
-    
-    location_stats['Unique Personnel'] = df.groupby('Location')['Personnel Name'].nunique()
-    location_stats = location_stats.sort_values('Total Visits', ascending=False)
+    # Location metrics in a single groupby pass
+    location_stats = df.groupby('Location', observed=True, sort=False).agg(**{
+        'Total Visits': ('Personnel Name', 'size'),
+        'Unique Personnel': ('Personnel Name', 'nunique')
+    }).sort_values('Total Visits', ascending=False)
     
     col1, col2, col3 = st.columns(3)
     
@@ -426,9 +536,7 @@ def show_location_analysis(df):
     # Map with all locations
     st.subheader("🗺️ Location Coverage Map")
     
-    location_data = df.groupby('Location').size().reset_index(name='Total Visits')
-    location_data['lat'] = location_data['Location'].apply(lambda x: get_location_coordinates(x)[0])
-    location_data['lon'] = location_data['Location'].apply(lambda x: get_location_coordinates(x)[1])
+    location_data = agg_location_counts(df, name='Total Visits')
     
     fig = px.scatter_mapbox(
         location_data,
@@ -449,14 +557,14 @@ def show_location_analysis(df):
     )
     st.plotly_chart(fig, use_container_width=True)
 
-def show_daily_timeline(df):
+def show_daily_timeline(df, day_options):
     """Display daily timeline view"""
     st.header("⏰ Daily Timeline View")
-    
-    selected_day = st.selectbox("Select Day", df['Day'].unique().tolist())
+
+    selected_day = st.selectbox("Select Day", day_options)
     
     day_df = df[df['Day'] == selected_day].copy()
-    
+
     if day_df.empty:
         st.warning(f"No data for {selected_day}")
         return
@@ -480,27 +588,16 @@ def show_daily_timeline(df):
     st.subheader(f"📅 {selected_day} - Team Activity")
     
     # Group by person and show their schedule
-    for person in sorted(day_df['Personnel Name'].unique()):
-        person_data = day_df[day_df['Personnel Name'] == person].sort_values('Check-In Time')
-        
+    day_df = day_df.sort_values(['Personnel Name', 'CheckInMin'])
+    for person, person_data in day_df.groupby('Personnel Name', observed=True, sort=False):
         with st.expander(f"👤 {person} ({len(person_data)} visits)"):
-            cols = st.columns([1, 2, 1, 1, 2])
-            
-            cols[0].write("**Visit #**")
-            cols[1].write("**Location**")
-            cols[2].write("**Check-In**")
-            cols[3].write("**Check-Out**")
-            cols[4].write("**Duration**")
-            
-            for idx, row in person_data.iterrows():
-                cols = st.columns([1, 2, 1, 1, 2])
-                duration = calculate_duration(row['Check-In Time'], row['Check-Out Time'])
-                
-                cols[0].write(f"{int(row['Visit #'])}")
-                cols[1].write(row['Location'])
-                cols[2].write(row['Check-In Time'])
-                cols[3].write(row['Check-Out Time'])
-                cols[4].write(f"{duration} min")
+            disp = person_data[['Visit #', 'Location', 'Check-In Time', 'Check-Out Time', 'Duration']]
+            disp = disp.rename(columns={
+                'Check-In Time': 'Check-In',
+                'Check-Out Time': 'Check-Out',
+                'Duration': 'Duration (min)'
+            })
+            st.dataframe(disp, use_container_width=True, hide_index=True)
 
 if __name__ == "__main__":
     main()
@@ -7,11 +7,18 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import numpy as np
 from datetime import datetime, date
 import gspread
 from google.oauth2.service_account import Credentials
 
+# Dark template set once instead of per-figure
+pio.templates.default = "plotly_dark"
+# Serialize figures with orjson — native NumPy support, no Python-level
+# conversion on every st.plotly_chart
+pio.json.config.default_engine = "orjson"
+
 # ─── Page Config ─────────────────────────────────────────────────────────────
 st.set_page_config(
     page_title="Sales Dashboard",
@@ -72,6 +79,22 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def kpi_row(cards):
+    """Render a row of KPI cards as one markdown delta instead of one per card."""
+    html = (
+        f'<div style="display:grid;grid-template-columns:repeat({len(cards)},1fr);gap:12px">'
+        + "".join(
+            '<div class="kpi-card">'
+            f'<div class="kpi-value">{val}</div>'
+            f'<div class="kpi-label">{label}</div>'
+            + (f'<div class="kpi-sub">{sub}</div>' if sub else "")
+            + "</div>"
+            for val, label, sub in cards
+        )
+        + "</div>"
+    )
+    st.markdown(html, unsafe_allow_html=True)
+
 # ─── Google Sheets ────────────────────────────────────────────────────────────
 DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
 
@@ -90,53 +113,76 @@ def get_gsheet_client():
 def load_data():
     client = get_gsheet_client()
     sh = client.open_by_key(st.secrets["app"]["SHEET_ID"])
-    all_dfs = []
-    for day in DAYS:
-        try:
-            ws      = sh.worksheet(day)
-            records = ws.get_all_records()
-            if records:
-                df = pd.DataFrame(records)
-                df["Day"] = day
-                all_dfs.append(df)
-        except gspread.WorksheetNotFound:
-            continue
-        except Exception:
+    # One values_batch_get RPC covers all six tabs, and the rows are
+    # accumulated into a single list so the frame is built once — no
+    # per-day DataFrame temporaries and no final pd.concat copy
+    present = [d for d in DAYS if d in {ws.title for ws in sh.worksheets()}]
+    if not present:
+        return pd.DataFrame()
+    resp = sh.values_batch_get([f"'{d}'" for d in present])
+    header = None
+    all_rows, day_col = [], []
+    for day, vr in zip(present, resp.get("valueRanges", [])):
+        values = vr.get("values", [])
+        if len(values) < 2:
             continue
-    if not all_dfs:
+        if header is None:
+            header = values[0]
+        width = len(header)
+        for row in values[1:]:
+            # the raw API omits trailing empty cells — pad to rectangle
+            if len(row) != width:
+                row = row[:width] + [""] * (width - len(row))
+            all_rows.append(row)
+            day_col.append(day)
+    if header is None:
         return pd.DataFrame()
-    df = pd.concat(all_dfs, ignore_index=True)
+    df = pd.DataFrame(all_rows, columns=header, copy=False)
+    df["Day"] = day_col
     return df
 
+def _hm_to_minutes(s: pd.Series) -> pd.Series:
+    """Minutes past midnight from fixed-shape ``HH:MM`` strings.
+
+    Splits on ``:`` and does integer math directly — no datetime objects
+    are ever constructed. Malformed or empty cells come back <NA>.
+    """
+    parts = s.astype(str).str.split(":", n=1, expand=True)
+    hours = pd.to_numeric(parts[0], errors="coerce")
+    mins  = pd.to_numeric(parts[1], errors="coerce") if parts.shape[1] > 1 else np.nan
+    return (hours * 60 + mins).astype("Int16")
+
+@st.cache_data(ttl=60, show_spinner=False)
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
-    # Parse times
-    for col in ["Check-In Time", "Check-Out Time", "Login Time", "Logout Time"]:
-        if col in df.columns:
-            df[col] = pd.to_datetime(df[col], format="%H:%M", errors="coerce").dt.time
-
-    # Duration in minutes
-    def duration_mins(row):
-        try:
-            cin  = row.get("Check-In Time")
-            cout = row.get("Check-Out Time")
-            if pd.isnull(cin) or pd.isnull(cout): return 0
-            diff = (datetime.combine(date.today(), cout) - datetime.combine(date.today(), cin)).total_seconds() / 60
-            return max(0, int(diff))
-        except Exception:
-            return 0
-
-    df["Duration (min)"] = df.apply(duration_mins, axis=1)
-
-    # Day order
-    day_order = {d: i for i, d in enumerate(DAYS)}
-    df["Day Order"] = df["Day"].map(day_order)
+    # Idempotence sentinel: a frame that has already been through here
+    # is returned as-is, so an accidental second call costs nothing
+    if df.attrs.get("cleaned"):
+        return df
+    # HH:MM → Int16 minutes; the original strings stay in place for
+    # display, so no strftime round-trip later. Login and Logout Time
+    # are never read by any view, so they stay raw strings.
+    if "Check-In Time" in df.columns and "Check-Out Time" in df.columns:
+        df["CheckInMin"]  = _hm_to_minutes(df["Check-In Time"])
+        df["CheckOutMin"] = _hm_to_minutes(df["Check-Out Time"])
+        # int16 is plenty (< 18h per visit) — half the memory traffic of int32
+        df["Duration (min)"] = ((df["CheckOutMin"] - df["CheckInMin"])
+                                .fillna(0).clip(lower=0).astype("int16"))
+    else:
+        df["Duration (min)"] = 0
+
+    # Ordered categoricals: isin/groupby/sort run on int8 codes instead
+    # of Python string comparisons
+    df["Day"] = pd.Categorical(df["Day"], categories=DAYS, ordered=True)
+    if "Personnel Name" in df.columns:
+        df["Personnel Name"] = df["Personnel Name"].astype("category")
 
     # Ensure Visit # is numeric
     if "Visit #" in df.columns:
-        df["Visit #"] = pd.to_numeric(df["Visit #"], errors="coerce").fillna(0).astype(int)
+        df["Visit #"] = pd.to_numeric(df["Visit #"], errors="coerce").fillna(0).astype("int16")
 
+    df.attrs["cleaned"] = True
     return df
 
 # ─── Load & clean ─────────────────────────────────────────────────────────────
@@ -153,16 +199,31 @@ if raw_df.empty:
         st.rerun()
     st.stop()
 
-df = clean_data(raw_df.copy())
+df = clean_data(raw_df)
+
+@st.cache_data(ttl=60)
+def _personnel_options(n_rows, day_key=None, people_key=None):
+    """Sorted personnel names for the given selection.
+
+    Keyed on the row count plus small selection tuples — near-free to
+    hash — so reruns reuse the list instead of re-running the
+    dropna/unique/sort scan every time a widget changes.
+    """
+    sub = df
+    if day_key is not None:
+        sub = sub[sub["Day"].isin(day_key)]
+    if people_key is not None:
+        sub = sub[sub["Personnel Name"].isin(people_key)]
+    return sorted(sub["Personnel Name"].dropna().unique().tolist())
 
 # ─── Sidebar filters ──────────────────────────────────────────────────────────
 with st.sidebar:
     st.markdown("## 🔍 Filters")
 
-    available_days  = [d for d in DAYS if d in df["Day"].unique()]
+    available_days  = df["Day"].cat.remove_unused_categories().cat.categories.tolist()
     selected_days   = st.multiselect("Days", available_days, default=available_days)
 
-    all_personnel   = sorted(df["Personnel Name"].dropna().unique().tolist())
+    all_personnel   = _personnel_options(len(df))
     selected_people = st.multiselect("Personnel", all_personnel, default=all_personnel)
 
     st.markdown("---")
@@ -181,16 +242,40 @@ with st.sidebar:
         st.rerun()
     st.markdown(f"<p style='color:#4a5568;font-size:0.75rem;margin-top:8px'>Last load: {datetime.now().strftime('%H:%M:%S')}</p>", unsafe_allow_html=True)
 
-# Apply filters
+# Apply filters — views only read from these, so no defensive .copy();
+# copy-on-write keeps any later column assignment from touching `df`
 filtered = df[
     df["Day"].isin(selected_days) &
     df["Personnel Name"].isin(selected_people)
-].copy()
+]
 
 if filtered.empty:
     st.warning("No data matches the current filters.")
     st.stop()
 
+@st.cache_data(ttl=60)
+def compute_overview(days_key, people_key):
+    """Team Overview aggregates, recomputed only when the filters change.
+
+    Keyed on the sorted selection tuples — cheap string hashes — so
+    expander toggles and view switches reuse the cached frames instead
+    of re-running every groupby against the cleaned frame.
+    """
+    sub = df[df["Day"].isin(days_key) & df["Personnel Name"].isin(people_key)]
+    per_person = (sub.groupby("Personnel Name", observed=True)
+                  .agg(Visits=("Visit #","count"),
+                       Avg_Duration=("Duration (min)","mean"),
+                       Total_Min=("Duration (min)","sum"))
+                  .reset_index())
+    daily = (sub.groupby("Day", observed=True).size().reset_index(name="Visits")
+             .sort_values("Day"))
+    # One C routine; the ordered Day categorical keeps columns Mon→Sat
+    # with no unstack or reindex
+    pivot = pd.crosstab(sub["Personnel Name"], sub["Day"])
+    top_locs = (sub.groupby("Location", observed=True).size().reset_index(name="Visits")
+                .sort_values("Visits", ascending=False).head(15))
+    return {"per_person": per_person, "daily": daily, "pivot": pivot, "top_locs": top_locs}
+
 # ─── Header ───────────────────────────────────────────────────────────────────
 st.markdown(f"""
 <div class="dash-header">
@@ -198,10 +283,16 @@ st.markdown(f"""
     <p>{len(selected_people)} personnel &nbsp;·&nbsp; {", ".join(selected_days)} &nbsp;·&nbsp; <span class="live-badge">● LIVE</span></p>
 </div>""", unsafe_allow_html=True)
 
+# Each view is a fragment: interacting with a widget inside it (a
+# selectbox, an expander) reruns only that view's body, not the whole
+# script. Sidebar filter changes still rerun everything since `filtered`
+# is rebuilt at the top.
+
 # ══════════════════════════════════════════════════════════════════════════════
 # VIEW 1 — TEAM OVERVIEW
 # ══════════════════════════════════════════════════════════════════════════════
-if view == "Team Overview":
+@st.fragment
+def render_team_overview(filtered):
 
     # KPIs
     total_visits    = len(filtered)
@@ -210,29 +301,22 @@ if view == "Team Overview":
     avg_duration    = filtered["Duration (min)"].mean()
     avg_visits_pp   = total_visits / total_personnel if total_personnel else 0
 
-    c1, c2, c3, c4, c5 = st.columns(5)
-    for col, val, label, sub in [
-        (c1, total_personnel,          "Personnel",        f"active this week"),
-        (c2, total_visits,             "Total Visits",     f"{avg_visits_pp:.1f} avg / person"),
-        (c3, total_locations,          "Locations",        "unique covered"),
-        (c4, f"{avg_duration:.0f}m",   "Avg Duration",     "per visit"),
-        (c5, f"{total_visits / len(selected_days) if selected_days else 0:.1f}", "Visits / Day", "average"),
-    ]:
-        col.markdown(f"""
-        <div class="kpi-card">
-            <div class="kpi-value">{val}</div>
-            <div class="kpi-label">{label}</div>
-            <div class="kpi-sub">{sub}</div>
-        </div>""", unsafe_allow_html=True)
+    kpi_row([
+        (total_personnel,          "Personnel",        "active this week"),
+        (total_visits,             "Total Visits",     f"{avg_visits_pp:.1f} avg / person"),
+        (total_locations,          "Locations",        "unique covered"),
+        (f"{avg_duration:.0f}m",   "Avg Duration",     "per visit"),
+        (f"{total_visits / len(selected_days) if selected_days else 0:.1f}", "Visits / Day", "average"),
+    ])
+
+    aggs = compute_overview(tuple(sorted(selected_days)), tuple(sorted(selected_people)))
+    per_person = aggs["per_person"]
 
     st.markdown('<div class="section-header">Visits by Personnel</div>', unsafe_allow_html=True)
-    visits_by_person = (filtered.groupby("Personnel Name")
-                        .agg(Visits=("Visit #","count"), Avg_Duration=("Duration (min)","mean"))
-                        .reset_index().sort_values("Visits", ascending=False))
+    visits_by_person = per_person.sort_values("Visits", ascending=False).head(30)
     fig = px.bar(visits_by_person, x="Personnel Name", y="Visits",
                  color="Avg_Duration", color_continuous_scale="Blues",
-                 labels={"Avg_Duration":"Avg Duration (min)", "Personnel Name":""},
-                 template="plotly_dark")
+                 labels={"Avg_Duration":"Avg Duration (min)", "Personnel Name":""},)
     fig.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117",
                       font_color="#a0aec0", coloraxis_colorbar_title="Avg min")
     st.plotly_chart(fig, use_container_width=True)
@@ -241,10 +325,8 @@ if view == "Team Overview":
 
     with col1:
         st.markdown('<div class="section-header">Daily Trend</div>', unsafe_allow_html=True)
-        daily = (filtered.groupby("Day").size().reset_index(name="Visits"))
-        daily["Day Order"] = daily["Day"].map({d:i for i,d in enumerate(DAYS)})
-        daily = daily.sort_values("Day Order")
-        fig2 = px.line(daily, x="Day", y="Visits", markers=True, template="plotly_dark",
+        daily = aggs["daily"]
+        fig2 = px.line(daily, x="Day", y="Visits", markers=True, render_mode="webgl",
                        color_discrete_sequence=["#63b3ed"])
         fig2.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117", font_color="#a0aec0")
         fig2.update_traces(line_width=2, marker_size=8)
@@ -252,29 +334,26 @@ if view == "Team Overview":
 
     with col2:
         st.markdown('<div class="section-header">Time in Field (hrs)</div>', unsafe_allow_html=True)
-        field_time = (filtered.groupby("Personnel Name")["Duration (min)"]
-                      .sum().reset_index()
-                      .assign(Hours=lambda x: x["Duration (min)"] / 60)
+        field_time = (per_person
+                      .assign(Hours=(per_person["Total_Min"] / 60).astype("float32"))
                       .sort_values("Hours", ascending=True))
-        fig3 = px.bar(field_time, x="Hours", y="Personnel Name", orientation="h",
-                      template="plotly_dark", color_discrete_sequence=["#4299e1"])
+        fig3 = px.bar(field_time.tail(30), x="Hours", y="Personnel Name", orientation="h",
+                      color_discrete_sequence=["#4299e1"])
         fig3.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117",
                            font_color="#a0aec0", yaxis_title="")
         st.plotly_chart(fig3, use_container_width=True)
 
     st.markdown('<div class="section-header">Activity Heatmap (Person × Day)</div>', unsafe_allow_html=True)
-    pivot = (filtered.groupby(["Personnel Name","Day"]).size()
-             .unstack(fill_value=0).reindex(columns=[d for d in DAYS if d in filtered["Day"].unique()]))
-    fig4 = px.imshow(pivot, color_continuous_scale="Blues", aspect="auto",
-                     labels=dict(color="Visits"), template="plotly_dark")
+    pivot = aggs["pivot"]
+    fig4 = px.imshow(pivot.astype("float32"), color_continuous_scale="Blues", aspect="auto",
+                     labels=dict(color="Visits"))
     fig4.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117", font_color="#a0aec0")
     st.plotly_chart(fig4, use_container_width=True)
 
     st.markdown('<div class="section-header">Top Locations</div>', unsafe_allow_html=True)
-    top_locs = (filtered.groupby("Location").size().reset_index(name="Visits")
-                .sort_values("Visits", ascending=False).head(15))
+    top_locs = aggs["top_locs"]
     fig5 = px.bar(top_locs, x="Visits", y="Location", orientation="h",
-                  template="plotly_dark", color_discrete_sequence=["#63b3ed"])
+                  color_discrete_sequence=["#63b3ed"])
     fig5.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117",
                        font_color="#a0aec0", yaxis_title="", height=450)
     st.plotly_chart(fig5, use_container_width=True)
@@ -282,47 +361,43 @@ if view == "Team Overview":
 # ══════════════════════════════════════════════════════════════════════════════
 # VIEW 2 — INDIVIDUAL PERFORMANCE
 # ══════════════════════════════════════════════════════════════════════════════
-elif view == "Individual Performance":
+@st.fragment
+def render_individual_performance(filtered):
 
-    person = st.selectbox("Select Salesperson", sorted(filtered["Personnel Name"].unique()))
-    pdf    = filtered[filtered["Personnel Name"] == person].copy()
+    person = st.selectbox("Select Salesperson",
+                          _personnel_options(len(df), tuple(sorted(selected_days)),
+                                             tuple(sorted(selected_people))))
+    pdf    = filtered[filtered["Personnel Name"] == person]
 
     total_v   = len(pdf)
     days_w    = pdf["Day"].nunique()
     unique_l  = pdf["Location"].nunique()
     total_hrs = pdf["Duration (min)"].sum() / 60
 
-    c1, c2, c3, c4 = st.columns(4)
-    for col, val, label in [
-        (c1, total_v,           "Total Visits"),
-        (c2, days_w,            "Days Worked"),
-        (c3, unique_l,          "Unique Locations"),
-        (c4, f"{total_hrs:.1f}h", "Field Hours"),
-    ]:
-        col.markdown(f"""
-        <div class="kpi-card">
-            <div class="kpi-value">{val}</div>
-            <div class="kpi-label">{label}</div>
-        </div>""", unsafe_allow_html=True)
+    kpi_row([
+        (total_v,             "Total Visits",     ""),
+        (days_w,              "Days Worked",      ""),
+        (unique_l,            "Unique Locations", ""),
+        (f"{total_hrs:.1f}h", "Field Hours",      ""),
+    ])
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('<div class="section-header">Visits per Day</div>', unsafe_allow_html=True)
-        daily_p = pdf.groupby("Day").size().reset_index(name="Visits")
-        daily_p["Day Order"] = daily_p["Day"].map({d:i for i,d in enumerate(DAYS)})
-        daily_p = daily_p.sort_values("Day Order")
-        fig = px.bar(daily_p, x="Day", y="Visits", template="plotly_dark",
+        daily_p = pdf.groupby("Day", observed=True).size().reset_index(name="Visits")
+        daily_p = daily_p.sort_values("Day")   # ordered categorical
+        fig = px.bar(daily_p, x="Day", y="Visits",
                      color_discrete_sequence=["#63b3ed"])
         fig.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117", font_color="#a0aec0")
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.markdown('<div class="section-header">Time by Location</div>', unsafe_allow_html=True)
-        time_loc = (pdf.groupby("Location")["Duration (min)"].sum()
+        time_loc = (pdf.groupby("Location", observed=True)["Duration (min)"].sum()
                     .reset_index().sort_values("Duration (min)", ascending=False).head(10))
         fig2 = px.pie(time_loc, names="Location", values="Duration (min)",
-                      template="plotly_dark", color_discrete_sequence=px.colors.sequential.Blues_r)
+                      color_discrete_sequence=px.colors.sequential.Blues_r)
         fig2.update_layout(paper_bgcolor="#0f1117", font_color="#a0aec0")
         st.plotly_chart(fig2, use_container_width=True)
 
@@ -330,21 +405,23 @@ elif view == "Individual Performance":
 
     display_cols = ["Day", "Visit #", "Location", "Check-In Time", "Check-Out Time", "Duration (min)", "Maps Link"]
     show_cols    = [c for c in display_cols if c in pdf.columns]
-    timeline_df  = pdf[show_cols].copy()
-    timeline_df["Day Order"] = timeline_df["Day"].map({d:i for i,d in enumerate(DAYS)})
-    timeline_df  = timeline_df.sort_values(["Day Order", "Visit #"]).drop(columns=["Day Order"])
-    timeline_df["Check-In Time"]  = timeline_df["Check-In Time"].astype(str)
-    timeline_df["Check-Out Time"] = timeline_df["Check-Out Time"].astype(str)
-    timeline_df["Duration (min)"] = timeline_df["Duration (min)"].apply(lambda x: f"{x} min")
+    timeline_df  = (pdf.sort_values(["Day", "Visit #"])
+                    .assign(**{
+                        "Check-In Time":  lambda d: d["Check-In Time"].where(d["CheckInMin"].notna(), "—"),
+                        "Check-Out Time": lambda d: d["Check-Out Time"].where(d["CheckOutMin"].notna(), "—"),
+                        "Duration (min)": lambda d: d["Duration (min)"].astype(str) + " min",
+                    })
+                    .loc[:, show_cols])
 
     st.dataframe(timeline_df, use_container_width=True, hide_index=True)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # VIEW 3 — LOCATION ANALYSIS
 # ══════════════════════════════════════════════════════════════════════════════
-elif view == "Location Analysis":
+@st.fragment
+def render_location_analysis(filtered):
 
-    loc_stats = (filtered.groupby("Location")
+    loc_stats = (filtered.groupby("Location", observed=True)
                  .agg(
                      Visits=("Visit #","count"),
                      Personnel=("Personnel Name","nunique"),
@@ -354,16 +431,17 @@ elif view == "Location Analysis":
                  .reset_index()
                  .sort_values("Visits", ascending=False))
 
-    c1, c2, c3 = st.columns(3)
-    c1.markdown(f'<div class="kpi-card"><div class="kpi-value">{len(loc_stats)}</div><div class="kpi-label">Locations Covered</div></div>', unsafe_allow_html=True)
-    c2.markdown(f'<div class="kpi-card"><div class="kpi-value">{loc_stats["Visits"].max()}</div><div class="kpi-label">Max Visits (single location)</div></div>', unsafe_allow_html=True)
-    c3.markdown(f'<div class="kpi-card"><div class="kpi-value">{loc_stats["Avg_Duration"].mean():.0f}m</div><div class="kpi-label">Overall Avg Duration</div></div>', unsafe_allow_html=True)
+    kpi_row([
+        (len(loc_stats),                          "Locations Covered",           ""),
+        (loc_stats["Visits"].max(),               "Max Visits (single location)", ""),
+        (f'{loc_stats["Avg_Duration"].mean():.0f}m', "Overall Avg Duration",     ""),
+    ])
 
     col1, col2 = st.columns(2)
     with col1:
         st.markdown('<div class="section-header">Most Visited Locations</div>', unsafe_allow_html=True)
         fig = px.bar(loc_stats.head(12), x="Visits", y="Location", orientation="h",
-                     template="plotly_dark", color_discrete_sequence=["#63b3ed"])
+                     color_discrete_sequence=["#63b3ed"])
         fig.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117",
                           font_color="#a0aec0", yaxis_title="", height=420)
         st.plotly_chart(fig, use_container_width=True)
@@ -372,7 +450,7 @@ elif view == "Location Analysis":
         st.markdown('<div class="section-header">Avg Visit Duration by Location</div>', unsafe_allow_html=True)
         top_dur = loc_stats.nlargest(12, "Avg_Duration")
         fig2 = px.bar(top_dur, x="Avg_Duration", y="Location", orientation="h",
-                      template="plotly_dark", color_discrete_sequence=["#4299e1"],
+                      color_discrete_sequence=["#4299e1"],
                       labels={"Avg_Duration": "Avg Duration (min)"})
         fig2.update_layout(paper_bgcolor="#0f1117", plot_bgcolor="#0f1117",
                            font_color="#a0aec0", yaxis_title="", height=420)
@@ -389,32 +467,51 @@ elif view == "Location Analysis":
 # ══════════════════════════════════════════════════════════════════════════════
 # VIEW 4 — DAILY TIMELINE
 # ══════════════════════════════════════════════════════════════════════════════
-elif view == "Daily Timeline":
+@st.fragment
+def render_daily_timeline(filtered):
 
-    available_days_f = [d for d in DAYS if d in filtered["Day"].unique()]
+    available_days_f = filtered["Day"].cat.remove_unused_categories().cat.categories.tolist()
     selected_day     = st.selectbox("Select Day", available_days_f)
-    day_df           = filtered[filtered["Day"] == selected_day].copy()
+    day_df           = filtered[filtered["Day"] == selected_day]
 
-    c1, c2, c3 = st.columns(3)
-    c1.markdown(f'<div class="kpi-card"><div class="kpi-value">{day_df["Personnel Name"].nunique()}</div><div class="kpi-label">Active Personnel</div></div>', unsafe_allow_html=True)
-    c2.markdown(f'<div class="kpi-card"><div class="kpi-value">{len(day_df)}</div><div class="kpi-label">Total Visits</div></div>', unsafe_allow_html=True)
-    c3.markdown(f'<div class="kpi-card"><div class="kpi-value">{day_df["Location"].nunique()}</div><div class="kpi-label">Locations Covered</div></div>', unsafe_allow_html=True)
+    kpi_row([
+        (day_df["Personnel Name"].nunique(), "Active Personnel",  ""),
+        (len(day_df),                        "Total Visits",      ""),
+        (day_df["Location"].nunique(),       "Locations Covered", ""),
+    ])
 
     st.markdown(f'<div class="section-header">Schedule — {selected_day}</div>', unsafe_allow_html=True)
 
-    for person in sorted(day_df["Personnel Name"].unique()):
-        person_day = day_df[day_df["Personnel Name"] == person].sort_values("Visit #")
+    # Build each visit's markdown in one vectorized pass, then emit a
+    # single st.markdown per person instead of one delta per row
+    cin  = day_df["Check-In Time"].where(day_df["CheckInMin"].notna(), "—")
+    cout = day_df["Check-Out Time"].where(day_df["CheckOutMin"].notna(), "—")
+    dur  = np.where(day_df["Duration (min)"] > 0,
+                    day_df["Duration (min)"].astype(str) + " min", "—")
+    if "Maps Link" in day_df.columns:
+        links = day_df["Maps Link"].fillna("").astype(str)
+        maps = np.where(links != "", "[📍 Map](" + links + ")", "")
+    else:
+        maps = ""
+    day_df["_row_md"] = (
+        "**Visit " + day_df["Visit #"].astype(str) + "** &nbsp; `"
+        + cin + " → " + cout + "` &nbsp; *(" + dur + ")* &nbsp; " + maps
+        + "\n> " + day_df["Location"].astype(str)
+    )
+
+    day_df = day_df.sort_values(["Personnel Name", "Visit #"])
+    for person, person_day in day_df.groupby("Personnel Name", observed=True, sort=False):
         total_v    = len(person_day)
         total_mins = person_day["Duration (min)"].sum()
         hrs_str    = f"{total_mins // 60}h {total_mins % 60}m" if total_mins else "—"
 
         with st.expander(f"👤 {person}  ·  {total_v} visits  ·  {hrs_str} in field"):
-            for _, row in person_day.iterrows():
-                cin  = str(row.get("Check-In Time",  "")).replace("None","—")
-                cout = str(row.get("Check-Out Time", "")).replace("None","—")
-                dur  = f"{row['Duration (min)']} min" if row["Duration (min)"] else "—"
-                maps = f"[📍 Map]({row['Maps Link']})" if row.get("Maps Link") else ""
-                st.markdown(f"""
-                **Visit {int(row['Visit #'])}** &nbsp; `{cin} → {cout}` &nbsp; *({dur})* &nbsp; {maps}
-                > {row['Location']}
-                """)
\ No newline at end of file
+            st.markdown("\n\n".join(person_day["_row_md"]))
+
+_VIEWS = {
+    "Team Overview":          render_team_overview,
+    "Individual Performance": render_individual_performance,
+    "Location Analysis":      render_location_analysis,
+    "Daily Timeline":         render_daily_timeline,
+}
+_VIEWS[view](filtered)
\ No newline at end of file